@@ -26,9 +26,38 @@ a 74HC165 PISO Shift register
 '''
 
 import RPi.GPIO as io
+import threading
 import time
 
 
+# unrolled shift in functions, one per bitcount, built on first use
+_shift_in_cache = {}
+
+
+def _build_shift_in(bitcount):
+
+    '''Builds a function that shifts bitcount bits out of the register as straight line
+    code with no loop. It is called as shift_in(io.input, io.output, data_pin, clock_pin)
+    and returns the reading packed into an integer, bit x being the value of pin x.
+
+    :param bitcount: Number of bits in the register/register chain
+    :return: The generated function
+    '''
+
+    if bitcount not in _shift_in_cache:
+        # the first bit is on the serial out pin once the register is loaded, every
+        # following bit needs a clock cycle before it can be read
+        lines = ['def shift_in(inp, out, data, clk):', '    bits = inp(data)']
+        lines += ['    out(clk, 1); out(clk, 0); bits = (bits << 1) | inp(data)'] * (bitcount - 1)
+        lines.append('    return bits')
+
+        namespace = {}
+        exec('\n'.join(lines), namespace)
+        _shift_in_cache[bitcount] = namespace['shift_in']
+
+    return _shift_in_cache[bitcount]
+
+
 class ShiftReg():
 
     '''
@@ -60,6 +89,9 @@ class ShiftReg():
 
         self.bitcount = bitcount
 
+        # shift in code unrolled for this bitcount, built once rather than looping on every read
+        self._unrolled_shift_in = _build_shift_in(bitcount)
+
     def __enter__(self):
 
         return self
@@ -75,18 +107,12 @@ class ShiftReg():
         :return: Nothing
         '''
 
-        # sets GPIO pins for output
         io.setup(self.data_pin, io.IN, pull_up_down=io.PUD_DOWN)
-        io.setup(self.clock_pin, io.OUT)
-        io.setup(self.clock_enable, io.OUT)
-        io.setup(self.load_reg_pin, io.OUT)
-
-        # sets default values on GPIO pins
-
-        io.output(self.clock_pin, 0)
-        io.output(self.clock_enable, 0)
-        io.output(self.load_reg_pin, 1)
 
+        # sets GPIO pins for output along with their default values, the pins
+        # start at these values instead of being set after they are configured
+        io.setup([self.clock_pin, self.clock_enable], io.OUT, initial=io.LOW)
+        io.setup(self.load_reg_pin, io.OUT, initial=io.HIGH)
 
     def _read_input(self):
 
@@ -100,17 +126,6 @@ class ShiftReg():
 
         return status
 
-    def _cycle_clock(self, n=1):
-
-        '''This method will cycle the clock pin high and low to shift
-        the data down the register
-
-        :param n: Number of times to cycle clock (Default 1 time)
-        :return:
-        '''
-
-        self._shift_register(n)
-
     def _shift_register(self, n=1):
 
         ''' This method cycles the clock pin high and low which
@@ -120,9 +135,29 @@ class ShiftReg():
         :return:
         '''
 
+        out = io.output
+        clk = self.clock_pin
+
         for x in range(n):
-            io.output(self.clock_pin, 1)
-            io.output(self.clock_pin, 0)
+            out(clk, 1)
+            out(clk, 0)
+
+    # older name for _shift_register, kept as an alias so it costs no extra call
+    _cycle_clock = _shift_register
+
+    def _shift_in(self):
+
+        '''This method shifts every bit out of the register in a single pass and
+        packs them into an integer. The first bit shifted out is the highest pin
+        in the chain so bit x of the result is the value of pin x.
+
+        :return: Integer with one bit per pin, bit 0 being pin 0
+        '''
+
+        # the clock only cycles between bits, shifting after the last bit would be
+        # thrown away by the next load. The bits are shifted up as they are read so
+        # the earlier bits end at their pin's position.
+        return self._unrolled_shift_in(io.input, io.output, self.data_pin, self.clock_pin)
 
     def read_register(self):
 
@@ -134,24 +169,60 @@ class ShiftReg():
         :return: List of pin values from the register lowest to highest pin.
         '''
 
-        register = []
+        # expands the packed reading into a list from pin0 - pin7
+        bits = self.read_register_bits()
+
+        return [(bits >> x) & 1 for x in range(self.bitcount)]
+
+    def read_register_bits(self):
+
+        '''This method handles reading the data out of the entire register like
+        read_register but keeps the values packed into a single integer instead of
+        building a list. Use it when reading in a loop, a reading can be compared to
+        the previous one with == and the value of pin x is (reading >> x) & 1
+
+        :return: Integer with one bit per pin, bit 0 being pin 0
+        '''
 
         # Loads the status of the input pins into the internal register
         self._load_register()
 
-        # shifts out each bit and stores the value
-        for x in range(self.bitcount):
-            # Stores the value of the pin
-            register.append(self._read_input())
+        return self._shift_in()
+
 
-            # Cycles the clock causing the register to shift
-            self._shift_register()
+    def read_registers_many(self, n):
 
-        # reverses the list so it reads from left to right pin0 - pin7
-        register.reverse()
+        '''This method reads the entire register n times back to back, for sampling the
+        inputs as fast as possible. The setup for the reads is only done once so each sample
+        is cheaper than a call to read_register_bits.
 
-        return register
+        Each sample takes (bitcount + 7) // 8 bytes, least significant byte first, so bit x of
+        a sample is the value of pin x like with read_register_bits.
+
+        :param n: Number of samples to take
+        :type n: int
+        :return: bytes containing the samples one after another
+        '''
 
+        size = (self.bitcount + 7) // 8
+        buf = bytearray(n * size)
+
+        # local names avoid repeated attribute lookups between samples
+        inp = io.input
+        out = io.output
+        data = self.data_pin
+        clk = self.clock_pin
+        load = self.load_reg_pin
+        shift_in = self._unrolled_shift_in
+
+        for offset in range(0, n * size, size):
+            # Loads the status of the input pins into the internal register
+            out(load, 0)
+            out(load, 1)
+
+            buf[offset:offset + size] = shift_in(inp, out, data, clk).to_bytes(size, 'little')
+
+        return bytes(buf)
 
     def _load_register(self):
 
@@ -184,9 +255,15 @@ class ReadHandler(ShiftReg):
     This class contains code that should be used when taking input from devices that multiple
     inputs could change state in the same read cycle. Interfacing with buttons would not
     be a good use case but interfacing with other electronics would be.
+
+    If an interrupt pin is given the register is only read when that pin sees an edge, instead
+    of being polled continuously. The signal on the interrupt pin must change state on every
+    change of any monitored input, any change it misses is only picked up by the re-read done
+    once edge_timeout passes without an edge.
     '''
 
-    def __init__(self, serial_out, load_pin, clock_enable, clock_pin, warnings=False, bitcount=8):
+    def __init__(self, serial_out, load_pin, clock_enable, clock_pin, warnings=False, bitcount=8,
+                 interrupt_pin=None, edge_timeout=100, bouncetime=0, poll_interval=1):
 
         '''
 
@@ -202,34 +279,89 @@ class ReadHandler(ShiftReg):
         :type warnings: bool
         :param bitcount: Number of bits in your register/register chain. ex. 1 register = 8; 2 = 16
         :type bitcount: int
+        :param interrupt_pin: BCM GPIO pin that changes state when any input changes, not required
+        :type interrupt_pin: int
+        :param edge_timeout: Milliseconds to wait for an edge before re-reading the register anyway
+        :type edge_timeout: int
+        :param bouncetime: Milliseconds after a change during which further changes are ignored (Default 0, off)
+        :type bouncetime: int
+        :param poll_interval: Milliseconds between reads when there is no interrupt pin, 0 reads as fast as possible
+        :type poll_interval: float
         '''
 
         ShiftReg.__init__(self, serial_out, load_pin, clock_enable, clock_pin, warnings, bitcount)
 
-        # reads the status of the input registers on initilization so it has a basline to go off of
-        self.last_reading = self.read_register()
+        self.interrupt_pin = interrupt_pin
+        self.edge_timeout = edge_timeout
+        self.bouncetime = bouncetime
+        self.poll_interval = poll_interval
+
+        # time of the last change that was handled, used for debouncing
+        self._last_change = 0
+
+        # lists filled by _detect_changed_pins, reused on every change instead of allocating new ones
+        self._pins_changed_up = []
+        self._pins_changed_down = []
+
+        # set from the GPIO event thread on every edge, any number of edges that arrive
+        # before watch_inputs gets to it are handled with a single read of the register
+        self._edge_event = threading.Event()
+
+        if self.interrupt_pin is not None:
+            io.setup(self.interrupt_pin, io.IN, pull_up_down=io.PUD_DOWN)
+            io.add_event_detect(self.interrupt_pin, io.BOTH, callback=self._on_edge)
+
+        # reads the status of the input registers on initilization so it has a basline to go off of,
+        # readings are kept packed into an integer with bit x holding the value of pin x
+        self.last_reading = self.read_register_bits()
         self.loop_breaker = False
 
+    def _on_edge(self, channel):
+
+        '''This method is called by RPi.GPIO when the interrupt pin sees an edge, it
+        flags that the register needs to be read again.
+
+        :param channel: The pin the edge was detected on
+        :return: Nothing
+        '''
+
+        self._edge_event.set()
+
     def _detect_changed_pins(self, reading, last_reading):
 
         '''This method is responsible for detecting changes in the state of the pins.
         It will detect if a pin was previously in an up state and changed to down and
         also if it was previously in a down state and changed to up.
 
+        The returned lists are reused and overwritten by the next call, they need to be
+        consumed (as _callback does) before the register is checked again.
+
         :param reading: The current reading of the state of the pins
+        :type reading: int
         :param last_reading: The previous reading of the state of the pins
+        :type last_reading: int
         :return: A list of the pins that were changed up and a list of the pins that were changed down.
         '''
 
-        pins_changed_up = []
-        pins_changed_down = []
+        pins_changed_up = self._pins_changed_up
+        pins_changed_down = self._pins_changed_down
+        pins_changed_up.clear()
+        pins_changed_down.clear()
 
-        for x in range(self.bitcount):
-            if reading[x] != last_reading[x]:
-                if reading[x] == 1:
-                    pins_changed_up.append(x)
-                else:
-                    pins_changed_down.append(x)
+        # bits that differ between the readings
+        changed = reading ^ last_reading
+
+        # only visits the bits that changed, lowest pin first
+        while changed:
+            bit = changed & -changed
+            pin = bit.bit_length() - 1
+
+            if reading & bit:
+                pins_changed_up.append(pin)
+            else:
+                pins_changed_down.append(pin)
+
+            changed ^= bit
 
         return pins_changed_up, pins_changed_down
 
@@ -285,18 +417,65 @@ class ReadHandler(ShiftReg):
         '''This method will loop to gather the status of the pins on the register and handle them accordingly
         To break out of this loop set the class attribute self.loop_breaker to True
 
+        When an interrupt pin is set the loop blocks until that pin sees an edge (or edge_timeout
+        passes) before reading the register, otherwise the register is read every poll_interval
+        milliseconds on a fixed schedule so time spent handling changes doesn't add drift. Edges
+        that arrive while the register is being read or handled are not lost, they are coalesced
+        into one more read. If bouncetime is set, changes within bouncetime milliseconds of the
+        last handled change are ignored until the window is over, the register is then read again
+        as soon as the window closes (in both modes) and the change is handled if it is still there.
+
         :return: Nothing
         '''
 
+        # time the next read is due when polling
+        next_read = time.monotonic()
+
+        # end of the bounce window when a change was skipped, the register needs to be read again then
+        bounce_end = None
+
         while True:
 
-            reading = self.read_register()
+            if self.interrupt_pin is not None:
+                timeout = self.edge_timeout / 1000.0
+
+                # no edge may come once the input settles so don't wait past the bounce window
+                if bounce_end is not None:
+                    timeout = min(timeout, max(bounce_end - time.monotonic(), 0))
+
+                self._edge_event.wait(timeout)
+
+                # cleared before reading so an edge during the read triggers another one
+                self._edge_event.clear()
+
+            elif self.poll_interval:
+                interval = self.poll_interval / 1000.0
+                delay = next_read - time.monotonic()
+
+                if delay > 0:
+                    time.sleep(delay)
+                    next_read += interval
+                else:
+                    # fell behind schedule, start again from now rather than reading in a burst to catch up
+                    next_read = time.monotonic() + interval
+
+            reading = self.read_register_bits()
+            bounce_end = None
 
             if reading != self.last_reading:
-                pins_changed_up, pins_changed_down = self._detect_changed_pins(reading, self.last_reading)
-                self._callback(pins_changed_up, pins_changed_down)
+                now = time.monotonic()
 
-                self.last_reading = reading
+                # changes inside the bounce window are skipped without updating last_reading,
+                # the register is read again when the window closes and a change that is still
+                # there gets handled then
+                if now - self._last_change >= self.bouncetime / 1000.0:
+                    pins_changed_up, pins_changed_down = self._detect_changed_pins(reading, self.last_reading)
+                    self._callback(pins_changed_up, pins_changed_down)
+
+                    self.last_reading = reading
+                    self._last_change = now
+                else:
+                    bounce_end = self._last_change + self.bouncetime / 1000.0
 
             if self.loop_breaker == True:
                 break